@@ -4,6 +4,7 @@ import java.nio.ByteBuffer;
 import java.nio.ByteOrder;
 import java.util.ArrayList;
 import java.util.Base64;
+import java.util.Collections;
 import java.util.HashMap;
 import java.util.List;
 import java.util.Map;
@@ -14,14 +15,40 @@ import com.fasterxml.jackson.databind.ObjectMapper;
 
 public class PythonUnpackHandler extends UserDefinedFunctionHandler {
     private static final String SOURCE_TYPE = "leyinetwork";
-    private HashMap<String, Integer> codeSize = new HashMap<String, Integer>() {
-        {
-            put("I", 4); // unsigned int, 4 bytes
-            put("H", 2); // unsigned short, 2 bytes
-            put("q", 8); // long long, 8 bytes
-            put("B", 1); // unsigned char, 1 bytes
+    // ObjectMapper 构造开销较大且配置后线程安全，所有调用共享一个实例
+    private static final ObjectMapper MAPPER = new ObjectMapper();
+    // 静态共享的编码表，按 char 查找，避免每个实例构造匿名 HashMap 以及每个字符 substring
+    private static final Map<Character, Integer> CODE_SIZE;
+    static {
+        Map<Character, Integer> codeSize = new HashMap<Character, Integer>();
+        codeSize.put('I', 4); // unsigned int, 4 bytes
+        codeSize.put('H', 2); // unsigned short, 2 bytes
+        codeSize.put('q', 8); // long long, 8 bytes
+        codeSize.put('B', 1); // unsigned char, 1 bytes
+        CODE_SIZE = Collections.unmodifiableMap(codeSize);
+    }
+
+    // 建筑数据每条记录为 IHH，其中第 2、3 个字段分别是建筑id和建筑等级
+    private static final String BUILDING_PATTERN = "IHH";
+    private static final int BUILDING_FIELDS = 3;
+
+    // 解析后的 padding 字段标记，padding 占 1 个字节且不输出值
+    private static final int PADDING = 0;
+
+    /**
+     * 解析后的解码模式
+     */
+    private static final class StructPattern {
+        final int[] fields; // 每个字段的字节数，padding 为 PADDING
+        final int recordSize; // 一条记录的字节数，包括 padding
+        final int valueCount; // 一条记录输出的值个数，不包括 padding
+
+        StructPattern(int[] fields, int recordSize, int valueCount) {
+            this.fields = fields;
+            this.recordSize = recordSize;
+            this.valueCount = valueCount;
         }
-    };
+    }
 
     public PythonUnpackHandler() {
         super(SOURCE_TYPE);
@@ -102,67 +129,130 @@ public class PythonUnpackHandler extends UserDefinedFunctionHandler {
      * @return List<List<Long>>
      */
     public List unpack(String pattern, String data) {
-        ArrayList<ArrayList<Long>> result = new ArrayList<ArrayList<Long>>();
-
         byte[] decodedBytes = Base64.getDecoder().decode(data);
+        // 整个 buffer 只包装一次，按绝对位置读取，避免每个字段都分配新的 ByteBuffer
+        ByteBuffer bb = ByteBuffer.wrap(decodedBytes).order(ByteOrder.LITTLE_ENDIAN);
+
+        if (decodedBytes.length == 0) { // 没有数据时不解析 pattern，直接返回空 list
+            return new ArrayList<ArrayList<Long>>();
+        }
+
+        StructPattern compiled = compilePattern(pattern);
+        ArrayList<ArrayList<Long>> result = new ArrayList<ArrayList<Long>>(recordCount(decodedBytes, compiled));
 
         int readIndex = 0;
         while (decodedBytes.length > readIndex) {
-            int patternIndex = 0;
-            ArrayList<Long> child = new ArrayList<Long>();
-            while (pattern.length() > patternIndex) {
-                String code = pattern.substring(patternIndex, patternIndex + 1);
-
-                // see python struct coding at https://docs.python.org/3/library/struct.html
-                if (code == "x") { // padding
-                    readIndex += 1;
-                } else if (codeSize.containsKey(code)) {
-                    int size = codeSize.get(code);
-                    child.add(extractBySize(decodedBytes, readIndex, size));
-                    readIndex += size;
-                } else {
-                    throw new IllegalArgumentException("unsupported python struct code: " + code);
-                }
-
-                patternIndex += 1;
-            }
+            ArrayList<Long> child = new ArrayList<Long>(compiled.valueCount);
+            readIndex = readRecord(bb, readIndex, compiled, child);
             result.add(child);
         }
 
         return result;
     }
 
-    private Long extractBySize(byte[] decodedBytes, int readIndex, int size) {
-        ByteBuffer bb = ByteBuffer.allocate(8);
-        bb.order(ByteOrder.LITTLE_ENDIAN);
-        bb.put(decodedBytes, readIndex, size);
-        Long l = bb.getLong(0);
+    /**
+     * 根据 buffer 长度估算记录条数，用于预分配 list 容量，避免扩容时反复拷贝
+     */
+    private int recordCount(byte[] decodedBytes, StructPattern compiled) {
+        return (decodedBytes.length + compiled.recordSize - 1) / compiled.recordSize;
+    }
 
-        return l;
+    /**
+     * 按解析后的模式读取一条记录，追加到 out 中
+     *
+     * @return 读取完这条记录之后的位置
+     */
+    private int readRecord(ByteBuffer bb, int readIndex, StructPattern compiled, List<Long> out) {
+        for (int size : compiled.fields) {
+            if (size == PADDING) {
+                readIndex += 1;
+            } else {
+                out.add(extractBySize(bb, readIndex, size));
+                readIndex += size;
+            }
+        }
+
+        return readIndex;
     }
 
-    public List<Long> unpackflat(String pattern, String data) {
-        List<List<Long>> result = unpack(pattern, data);
-        ArrayList<Long> flat = new ArrayList<Long>();
+    /**
+     * 把解码模式解析为每个字段的字节数，padding 记为 PADDING
+     * 每次调用只解析一次，而不是每条记录都重新解析
+     *
+     * @param pattern 例如 IHH
+     * @return 例如 fields=[4, 2, 2], recordSize=8, valueCount=3
+     */
+    private StructPattern compilePattern(String pattern) {
+        if (pattern.isEmpty()) {
+            throw new IllegalArgumentException("empty python struct pattern");
+        }
 
-        for (List<Long> sub : result) {
-            for (Long l : sub) {
-                flat.add(l);
+        int[] fields = new int[pattern.length()];
+        int recordSize = 0;
+        int valueCount = 0;
+        for (int i = 0; i < pattern.length(); i++) {
+            char code = pattern.charAt(i);
+            Integer size = CODE_SIZE.get(code);
+
+            // see python struct coding at https://docs.python.org/3/library/struct.html
+            if (code == 'x') { // padding
+                fields[i] = PADDING;
+                recordSize += 1;
+            } else if (size != null) {
+                fields[i] = size;
+                recordSize += size;
+                valueCount += 1;
+            } else {
+                throw new IllegalArgumentException("unsupported python struct code: " + code);
             }
         }
 
+        return new StructPattern(fields, recordSize, valueCount);
+    }
+
+    private Long extractBySize(ByteBuffer bb, int readIndex, int size) {
+        switch (size) {
+            case 1:
+                return (long) (bb.get(readIndex) & 0xFF);
+            case 2:
+                return (long) (bb.getShort(readIndex) & 0xFFFF);
+            case 4:
+                return bb.getInt(readIndex) & 0xFFFFFFFFL;
+            default:
+                return bb.getLong(readIndex);
+        }
+    }
+
+    public List<Long> unpackflat(String pattern, String data) {
+        byte[] decodedBytes = Base64.getDecoder().decode(data);
+        ByteBuffer bb = ByteBuffer.wrap(decodedBytes).order(ByteOrder.LITTLE_ENDIAN);
+
+        if (decodedBytes.length == 0) {
+            return new ArrayList<Long>();
+        }
+
+        StructPattern compiled = compilePattern(pattern);
+        ArrayList<Long> flat = new ArrayList<Long>(recordCount(decodedBytes, compiled) * compiled.valueCount);
+
+        // 直接写入同一个 list，不再先构造嵌套 list 再展开
+        int readIndex = 0;
+        while (decodedBytes.length > readIndex) {
+            readIndex = readRecord(bb, readIndex, compiled, flat);
+        }
+
         return flat;
     }
 
     public List<HashMap<String, Long>> building(String data) {
-        List<List<Long>> raw = unpack("IHH", data);
-        List<HashMap<String, Long>> result = new ArrayList<HashMap<String, Long>>();
+        // 用 flat 结果按步长读取，省去每条记录一个子 list 以及二次遍历
+        List<Long> raw = unpackflat(BUILDING_PATTERN, data);
+        List<HashMap<String, Long>> result = new ArrayList<HashMap<String, Long>>(raw.size() / BUILDING_FIELDS);
 
-        for (List<Long> sub : raw) {
-            String buindingId = sub.get(1).toString();
-            Long buildingLevel = sub.get(2);
+        for (int i = 0; i < raw.size(); i += BUILDING_FIELDS) {
+            String buindingId = raw.get(i + 1).toString();
+            Long buildingLevel = raw.get(i + 2);
 
-            HashMap<String, Long> row = new HashMap<String, Long>();
+            HashMap<String, Long> row = new HashMap<String, Long>(2);
             row.put(buindingId, buildingLevel);
 
             result.add(row);
@@ -172,19 +262,18 @@ public class PythonUnpackHandler extends UserDefinedFunctionHandler {
     }
 
     public String buildingjson(String data) {
-        List<List<Long>> raw = unpack("IHH", data);
+        List<Long> raw = unpackflat(BUILDING_PATTERN, data);
         HashMap<String, Long> result = new HashMap<String, Long>();
 
-        for (List<Long> sub : raw) {
-            String buindingId = sub.get(1).toString();
-            Long buildingLevel = sub.get(2);
+        for (int i = 0; i < raw.size(); i += BUILDING_FIELDS) {
+            String buindingId = raw.get(i + 1).toString();
+            Long buildingLevel = raw.get(i + 2);
 
             result.put(buindingId, buildingLevel);
         }
 
-        ObjectMapper mapper = new ObjectMapper();
         try {
-            return mapper.writeValueAsString(result);
+            return MAPPER.writeValueAsString(result);
         } catch (JsonProcessingException e) {
             // TODO Auto-generated catch block
             e.printStackTrace();
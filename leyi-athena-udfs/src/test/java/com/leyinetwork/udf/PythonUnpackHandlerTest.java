@@ -1,6 +1,7 @@
 package com.leyinetwork.udf;
 
 import static org.junit.jupiter.api.Assertions.assertEquals;
+import static org.junit.jupiter.api.Assertions.assertThrows;
 
 import java.util.HashMap;
 import java.util.List;
@@ -23,6 +24,44 @@ class PythonUnpackHandlerTest {
         assertEquals(2, result.get(12).get(1));
     }
 
+    @Test
+    public void testUnpackPadding() {
+        List<List<Long>> result = handler.unpack("BxH", "Bf8CAA==");
+        assertEquals(1, result.size());
+        assertEquals(2, result.get(0).size());
+        assertEquals(5, result.get(0).get(0));
+        assertEquals(2, result.get(0).get(1));
+    }
+
+    @Test
+    public void testUnpackHighBit() {
+        // I=0xFFFFFFFF, H=0xFFFF, B=0xFF, q=-2
+        List<Long> result = handler.unpackflat("IHBq", "//////////7/////////");
+        assertEquals(4, result.size());
+        assertEquals(4294967295L, result.get(0));
+        assertEquals(65535L, result.get(1));
+        assertEquals(255L, result.get(2));
+        assertEquals(-2L, result.get(3));
+    }
+
+    @Test
+    public void testUnpackTruncatedRecord() {
+        // IH 需要 6 个字节，这里只有 5 个
+        assertThrows(IndexOutOfBoundsException.class, () -> handler.unpack("IH", "AAAAAAA="));
+    }
+
+    @Test
+    public void testUnpackUnsupportedCode() {
+        assertThrows(IllegalArgumentException.class, () -> handler.unpack("IZ", "Bf8CAA=="));
+        assertThrows(IllegalArgumentException.class, () -> handler.unpack("", "Bf8CAA=="));
+    }
+
+    @Test
+    public void testUnpackEmptyData() {
+        assertEquals(0, handler.unpack("", "").size());
+        assertEquals(0, handler.unpackflat("IZ", "").size());
+    }
+
     @Test
     public void testUnpackFlat() {
         List<Long> result = handler.unpackflat("IHH",
@@ -43,10 +82,30 @@ class PythonUnpackHandlerTest {
                 "ZQAAAAAAAgCBAAAAMgABAIIAAAAzAAEAgwAAADQAAQCEAAAANQABAHkAAAATAAEAdgAAAAwAAQDNAAAADwABAMsAAAAQAAEAzAAAABEAAQDOAAAAEgABAHsAAAAFAAEAZgAAAAIAAQA=");
         System.out.println(result);
         assertEquals(13, result.size());
+        assertEquals(1, result.get(0).size());
+        assertEquals(2, result.get(0).get("0"));
+        assertEquals(1, result.get(1).get("50"));
+        assertEquals(1, result.get(12).get("2"));
         // assertEquals(2, result.get("0"));
         // assertEquals(1, result.get("2"));
         // assertEquals(1, result.get("17"));
         // assertEquals(1, result.get("19"));
+    }
+
+    @Test
+    public void testBuildingJson() {
+        String result = handler.buildingjson(
+                "ZQAAAAAAAgCBAAAAMgABAIIAAAAzAAEAgwAAADQAAQCEAAAANQABAHkAAAATAAEAdgAAAAwAAQDNAAAADwABAMsAAAAQAAEAzAAAABEAAQDOAAAAEgABAHsAAAAFAAEAZgAAAAIAAQA=");
+        System.out.println(result);
+        // key 的顺序就是 HashMap 的遍历顺序
+        assertEquals("{\"12\":1,\"15\":1,\"16\":1,\"17\":1,\"18\":1,\"19\":1,\"0\":2,\"2\":1,\"5\":1,"
+                + "\"50\":1,\"51\":1,\"52\":1,\"53\":1}", result);
+    }
+
+    @Test
+    public void testBuildingJsonDuplicateId() {
+        // 两条记录的建筑id都是 7，等级分别为 3 和 5，后面的覆盖前面的
+        assertEquals("{\"7\":5}", handler.buildingjson("AQAAAAcAAwACAAAABwAFAA=="));
     }     
 }
 